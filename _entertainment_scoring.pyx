@@ -0,0 +1,62 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# Optional compiled scoring kernel for the Entertainment AI Agent.
+# Build it with: python setup.py build_ext --inplace
+
+from libc.stdint cimport int64_t
+
+
+cdef inline int64_t count_wanted(const int64_t[::1] offsets, const int64_t[::1] ids,
+                                 const unsigned char[::1] wanted, Py_ssize_t row) noexcept nogil:
+    cdef int64_t matches = 0
+    cdef int64_t j
+    for j in range(offsets[row], offsets[row + 1]):
+        if wanted[ids[j]]:
+            matches += 1
+    return matches
+
+
+cdef inline bint contains(const int64_t[::1] values, int64_t value) noexcept nogil:
+    cdef Py_ssize_t k
+    for k in range(values.shape[0]):
+        if values[k] == value:
+            return True
+    return False
+
+
+def score_all(const double[::1] ratings, const int64_t[::1] years,
+              const int64_t[::1] genre_offsets, const int64_t[::1] genre_ids, const unsigned char[::1] wanted_genres,
+              const int64_t[::1] creators, const unsigned char[::1] wanted_creators, double creator_weight,
+              const int64_t[::1] extra_offsets, const int64_t[::1] extra_ids, const unsigned char[::1] wanted_extras,
+              double extra_weight, bint extra_per_match,
+              const int64_t[::1] exact_years, const int64_t[::1] near_years,
+              const unsigned char[::1] consumed, double[::1] out):
+    """Compiled calculate_match_score over structure-of-arrays columns, written into 'out'.
+
+    Takes the same arguments as the Numba kernel in main.py and adds the
+    terms in the same order, so every scorer produces identical results.
+    """
+    cdef Py_ssize_t i
+    cdef double score
+    cdef int64_t matches
+    with nogil:
+        for i in range(ratings.shape[0]):
+            score = ratings[i] / 10.0
+            score += 0.3 * count_wanted(genre_offsets, genre_ids, wanted_genres, i)
+            
+            if contains(exact_years, years[i]):
+                score += 0.2
+            elif contains(near_years, years[i]):
+                score += 0.1
+            
+            if wanted_creators[creators[i]]:
+                score += creator_weight
+            
+            matches = count_wanted(extra_offsets, extra_ids, wanted_extras, i)
+            if extra_per_match:
+                score += extra_weight * matches
+            elif matches > 0:
+                score += extra_weight
+            
+            if consumed[i]:
+                score -= 1.0
+            out[i] = score
@@ -1,21 +1,121 @@
 # Entertainment AI Agent
 # This AI agent recommends movies, music, books, and games based on user preferences and current trends
 
+import functools
+import heapq
 import json
+import math
 import random
-from datetime import datetime
-from typing import Dict, List, Optional, Union
+import sys
+import time
+import types
+import weakref
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import ClassVar, Dict, List, Mapping, Optional, Union
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; scoring falls back to pure Python
+    np = None
+
+try:
+    import _entertainment_scoring  # optional Cython build of the scoring kernel, see setup.py
+except ImportError:
+    _entertainment_scoring = None
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the NumPy scorer is used without it
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; JSON files fall back to the standard library
+    orjson = None
+
+
+def _write_json(filename: str, data: Dict):
+    """Write data as compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data))
+    else:
+        with open(filename, 'w') as f:
+            f.write(json.dumps(data, separators=(',', ':')))
+
+
+def _read_json(filename: str) -> Dict:
+    """Read a JSON file, using orjson when it is installed."""
+    with open(filename, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+@dataclass(slots=True, eq=False)
 class EntertainmentItem:
     """Base class for all entertainment items."""
-    def __init__(self, item_id: str, title: str, genre: List[str], year: int, rating: float):
-        self.item_id = item_id
-        self.title = title
-        self.genre = genre
-        self.year = year
-        self.rating = rating
+    media_type: ClassVar[Optional[str]] = None
+    
+    # Keys of the saved dict in constructor order, and those that may be missing
+    saved_keys: ClassVar[tuple] = ("id", "title", "genre", "year", "rating")
+    optional_keys: ClassVar[tuple] = ()
+    
+    item_id: str
+    title: str
+    genre: List[str]
+    year: int
+    rating: float
+    _cached_dict: Optional[Dict] = field(default=None, init=False, repr=False)
+    _title_lower: str = field(default="", init=False, repr=False)
+    _genre_lower: tuple = field(default=(), init=False, repr=False)
+    
+    def __post_init__(self):
+        # Lowercased once here so searches never re-lower titles and genres
+        self._title_lower = self.title.lower()
+        self._genre_lower = tuple(genre.lower() for genre in self.genre)
+    
+    def matches_query(self, query: str) -> bool:
+        """Check if the title or a genre contains the lowercased query."""
+        return query in self._title_lower or any(query in genre for genre in self._genre_lower)
     
     def to_dict(self) -> Dict:
+        # Items are not modified after construction, so the dict is built once
+        if self._cached_dict is None:
+            self._cached_dict = self._build_dict()
+        return self._cached_dict
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EntertainmentItem':
+        return cls(*(data.get(key) if key in cls.optional_keys else data[key] for key in cls.saved_keys))
+    
+    @classmethod
+    def check_dict(cls, data: Dict):
+        """Raise KeyError or TypeError if from_dict cannot build a usable item from data."""
+        if not isinstance(data, dict):
+            raise TypeError(f"{cls.media_type} entry is not an object")
+        for key in cls.saved_keys:
+            if key not in data and key not in cls.optional_keys:
+                raise KeyError(key)
+        
+        # The values construction, search indexing and scoring rely on
+        creator_attr, _, list_attr, _ = _COLUMN_FIELDS[cls.media_type]
+        if not isinstance(data["title"], str):
+            raise TypeError(f"{cls.media_type} {data['id']!r}: title is not a string")
+        if not isinstance(data["genre"], list) or not all(isinstance(genre, str) for genre in data["genre"]):
+            raise TypeError(f"{cls.media_type} {data['id']!r}: genre is not a list of strings")
+        if not isinstance(data["year"], int) or not isinstance(data["rating"], (int, float)):
+            raise TypeError(f"{cls.media_type} {data['id']!r}: year or rating is not a number")
+        if not isinstance(data[creator_attr], Hashable):
+            raise TypeError(f"{cls.media_type} {data['id']!r}: {creator_attr} is not a single value")
+        if list_attr and (not isinstance(data[list_attr], list)
+                          or not all(isinstance(value, Hashable) for value in data[list_attr])):
+            raise TypeError(f"{cls.media_type} {data['id']!r}: {list_attr} is not a list of values")
+    
+    def _build_dict(self) -> Dict:
+        # Subclasses call EntertainmentItem._build_dict(self) explicitly because
+        # zero-argument super() does not work in slotted dataclasses
         return {
             "id": self.item_id,
             "title": self.title,
@@ -24,17 +124,18 @@ class EntertainmentItem:
             "rating": self.rating
         }
 
+@dataclass(slots=True, eq=False)
 class Movie(EntertainmentItem):
     """Class representing a movie."""
-    def __init__(self, item_id: str, title: str, genre: List[str], year: int, rating: float, 
-                 director: str, actors: List[str], duration: int):
-        super().__init__(item_id, title, genre, year, rating)
-        self.director = director
-        self.actors = actors
-        self.duration = duration  # in minutes
+    media_type: ClassVar[str] = "movie"
+    saved_keys: ClassVar[tuple] = EntertainmentItem.saved_keys + ("director", "actors", "duration")
     
-    def to_dict(self) -> Dict:
-        movie_dict = super().to_dict()
+    director: str
+    actors: List[str]
+    duration: int  # in minutes
+    
+    def _build_dict(self) -> Dict:
+        movie_dict = EntertainmentItem._build_dict(self)
         movie_dict.update({
             "director": self.director,
             "actors": self.actors,
@@ -43,17 +144,19 @@ class Movie(EntertainmentItem):
         })
         return movie_dict
 
+@dataclass(slots=True, eq=False)
 class Music(EntertainmentItem):
     """Class representing a music album or track."""
-    def __init__(self, item_id: str, title: str, genre: List[str], year: int, rating: float,
-                 artist: str, album: Optional[str] = None, duration: Optional[int] = None):
-        super().__init__(item_id, title, genre, year, rating)
-        self.artist = artist
-        self.album = album
-        self.duration = duration  # in seconds
+    media_type: ClassVar[str] = "music"
+    saved_keys: ClassVar[tuple] = EntertainmentItem.saved_keys + ("artist", "album", "duration")
+    optional_keys: ClassVar[tuple] = ("album", "duration")
     
-    def to_dict(self) -> Dict:
-        music_dict = super().to_dict()
+    artist: str
+    album: Optional[str] = None
+    duration: Optional[int] = None  # in seconds
+    
+    def _build_dict(self) -> Dict:
+        music_dict = EntertainmentItem._build_dict(self)
         music_dict.update({
             "artist": self.artist,
             "album": self.album,
@@ -62,17 +165,18 @@ class Music(EntertainmentItem):
         })
         return music_dict
 
+@dataclass(slots=True, eq=False)
 class Book(EntertainmentItem):
     """Class representing a book."""
-    def __init__(self, item_id: str, title: str, genre: List[str], year: int, rating: float,
-                 author: str, pages: int, publisher: str):
-        super().__init__(item_id, title, genre, year, rating)
-        self.author = author
-        self.pages = pages
-        self.publisher = publisher
+    media_type: ClassVar[str] = "book"
+    saved_keys: ClassVar[tuple] = EntertainmentItem.saved_keys + ("author", "pages", "publisher")
     
-    def to_dict(self) -> Dict:
-        book_dict = super().to_dict()
+    author: str
+    pages: int
+    publisher: str
+    
+    def _build_dict(self) -> Dict:
+        book_dict = EntertainmentItem._build_dict(self)
         book_dict.update({
             "author": self.author,
             "pages": self.pages,
@@ -81,17 +185,18 @@ class Book(EntertainmentItem):
         })
         return book_dict
 
+@dataclass(slots=True, eq=False)
 class Game(EntertainmentItem):
     """Class representing a video game."""
-    def __init__(self, item_id: str, title: str, genre: List[str], year: int, rating: float,
-                 developer: str, platforms: List[str], multiplayer: bool):
-        super().__init__(item_id, title, genre, year, rating)
-        self.developer = developer
-        self.platforms = platforms
-        self.multiplayer = multiplayer
+    media_type: ClassVar[str] = "game"
+    saved_keys: ClassVar[tuple] = EntertainmentItem.saved_keys + ("developer", "platforms", "multiplayer")
     
-    def to_dict(self) -> Dict:
-        game_dict = super().to_dict()
+    developer: str
+    platforms: List[str]
+    multiplayer: bool
+    
+    def _build_dict(self) -> Dict:
+        game_dict = EntertainmentItem._build_dict(self)
         game_dict.update({
             "developer": self.developer,
             "platforms": self.platforms,
@@ -100,61 +205,197 @@ class Game(EntertainmentItem):
         })
         return game_dict
 
+# Media type -> key of its collection in saved files and agent results
+_COLLECTION_KEYS = {"movie": "movies", "music": "music", "book": "books", "game": "games"}
+_ITEM_CLASSES = {"movie": Movie, "music": Music, "book": Book, "game": Game}
+
 class UserProfile:
-    """Class to store and manage user preferences."""
+    """Class to store and manage user preferences.
+    
+    Change preferences and history only through add_preference and
+    add_to_history; cached recommendations are invalidated by those two.
+    """
+    __slots__ = ("user_id", "name", "preferences", "history", "_version", "__weakref__")
+    
     def __init__(self, user_id: str, name: str):
         self.user_id = user_id
         self.name = name
+        # Values are dict keys rather than set members: hashed like a set, but
+        # kept in the order they were added
         self.preferences = {
-            "movie": {"genres": [], "actors": [], "directors": [], "years": [], "ratings": []},
-            "music": {"genres": [], "artists": [], "years": [], "ratings": []},
-            "book": {"genres": [], "authors": [], "years": [], "ratings": []},
-            "game": {"genres": [], "developers": [], "platforms": [], "years": [], "ratings": []}
+            "movie": {"genres": {}, "actors": {}, "directors": {}, "years": {}, "ratings": {}},
+            "music": {"genres": {}, "artists": {}, "years": {}, "ratings": {}},
+            "book": {"genres": {}, "authors": {}, "years": {}, "ratings": {}},
+            "game": {"genres": {}, "developers": {}, "platforms": {}, "years": {}, "ratings": {}}
         }
         self.history = {
-            "movie": [],
-            "music": [],
-            "book": [],
-            "game": []
+            "movie": {},
+            "music": {},
+            "book": {},
+            "game": {}
         }
+        self._version = 0  # bumped on every change, keys the recommendation cache
     
     def add_preference(self, media_type: str, category: str, value: Union[str, int, float]):
         """Add a user preference."""
         if media_type in self.preferences and category in self.preferences[media_type]:
-            if value not in self.preferences[media_type][category]:
-                self.preferences[media_type][category].append(value)
+            self.preferences[media_type][category][value] = None
+            self._version += 1
     
     def add_to_history(self, media_type: str, item_id: str):
         """Add an item to user's history."""
-        if media_type in self.history and item_id not in self.history[media_type]:
-            self.history[media_type].append(item_id)
+        if media_type in self.history:
+            self.history[media_type][item_id] = None
+            self._version += 1
     
     def to_dict(self) -> Dict:
         return {
             "user_id": self.user_id,
             "name": self.name,
-            "preferences": self.preferences,
-            "history": self.history
+            "preferences": {media_type: {category: list(values) for category, values in categories.items()}
+                            for media_type, categories in self.preferences.items()},
+            "history": {media_type: list(item_ids) for media_type, item_ids in self.history.items()}
         }
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'UserProfile':
         user = cls(data["user_id"], data["name"])
-        user.preferences = data["preferences"]
-        user.history = data["history"]
+        user.preferences = {media_type: {category: dict.fromkeys(values) for category, values in categories.items()}
+                            for media_type, categories in data["preferences"].items()}
+        user.history = {media_type: dict.fromkeys(item_ids) for media_type, item_ids in data["history"].items()}
         return user
 
+# Per media type: the single-valued creator attribute, the optional
+# multi-valued attribute, and the preference categories each is scored against.
+_COLUMN_FIELDS = {
+    "movie": ("director", "directors", "actors", "actors"),
+    "music": ("artist", "artists", None, None),
+    "book": ("author", "authors", None, None),
+    "game": ("developer", "developers", "platforms", "platforms")
+}
+
+class CatalogColumns:
+    """Structure-of-arrays view of one media type, used for vectorized scoring."""
+    def __init__(self, items: List[EntertainmentItem], value_ids: Dict[str, Dict], media_type: str):
+        creator_attr, _, list_attr, _ = _COLUMN_FIELDS[media_type]
+        self.items = items
+        self.rows = {item.item_id: row for row, item in enumerate(items)}
+        self.ratings = np.array([item.rating for item in items], dtype=np.float64)
+        self.years = np.array([item.year for item in items], dtype=np.int64)
+        self.creators = np.array([self._intern(value_ids["creator"], getattr(item, creator_attr))
+                                  for item in items], dtype=np.int64)
+        
+        # Multi-valued attributes are stored as (row, value id) coordinate pairs
+        # plus CSR row offsets; media types without one get empty columns
+        self.genres = self._pairs([item.genre for item in items], value_ids["genre"])
+        if list_attr:
+            self.extras = self._pairs([getattr(item, list_attr) for item in items], value_ids[list_attr])
+        else:
+            self.extras = self._pairs([[] for _ in items], {})
+    
+    @staticmethod
+    def _intern(ids: Dict, value) -> int:
+        return ids.setdefault(value, len(ids))
+    
+    @classmethod
+    def _pairs(cls, values: List[List[str]], ids: Dict):
+        rows = [row for row, row_values in enumerate(values) for _ in row_values]
+        indices = [cls._intern(ids, value) for row_values in values for value in row_values]
+        offsets = [0]
+        for row_values in values:
+            offsets.append(offsets[-1] + len(row_values))
+        return (np.array(rows, dtype=np.int64), np.array(indices, dtype=np.int64),
+                np.array(offsets, dtype=np.int64))
+    
+    def count_matches(self, pairs, ids: Dict, wanted_values) -> "np.ndarray":
+        """Count, per row, how many of its values appear in wanted_values."""
+        rows, indices, _ = pairs
+        return np.bincount(rows, weights=_wanted_mask(ids, wanted_values)[indices], minlength=len(self.items))
+    
+    def is_member(self, ids: Dict, wanted_values) -> "np.ndarray":
+        """Flag rows whose creator appears in wanted_values."""
+        return _wanted_mask(ids, wanted_values)[self.creators]
+
+def _wanted_mask(ids: Dict, wanted_values) -> "np.ndarray":
+    """Boolean lookup table over value ids, set for the wanted values."""
+    wanted = np.zeros(len(ids), dtype=bool)
+    wanted[[ids[value] for value in wanted_values if value in ids]] = True
+    return wanted
+
+# Range of the int64 year columns; preferred years are only matched within it
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+class PreferenceSnapshot:
+    """Hashed view of a user's preferences for one media type, built once per recommendation call."""
+    def __init__(self, user: UserProfile, media_type: str, value_ids: Dict[str, Dict]):
+        creator_attr, creator_pref, list_attr, list_pref = _COLUMN_FIELDS[media_type]
+        prefs = user.preferences[media_type]
+        self.media_type = media_type
+        self.creator_attr = creator_attr
+        self.list_attr = list_attr
+        self.genres = frozenset(prefs["genres"])
+        self.years = frozenset(prefs["years"])
+        
+        # Item years are integers: only whole preferred years can match exactly, and
+        # the years within 5 of a preference are the integers in [year - 5, year + 5].
+        # Infinite and NaN preferences match nothing, and both sets stay within int64.
+        finite = [year for year in self.years if isinstance(year, int) or math.isfinite(year)]
+        self.whole_years = frozenset(int(year) for year in finite
+                                     if year == math.floor(year) and _INT64_MIN <= year <= _INT64_MAX)
+        self.near_years = frozenset(near for year in finite
+                                    for near in range(max(math.ceil(year - 5), _INT64_MIN),
+                                                      min(math.floor(year + 5), _INT64_MAX) + 1))
+        self.creators = frozenset(prefs[creator_pref])
+        self.extras = frozenset(prefs[list_pref]) if list_pref else frozenset()
+        self.history = frozenset(user.history[media_type])
+        
+        # Bitsets over the database's value ids, matched against EntertainmentDatabase.get_masks
+        self.genre_mask = self._known_mask(value_ids["genre"], self.genres)
+        self.extras_mask = self._known_mask(value_ids[list_attr], self.extras) if list_attr else 0
+    
+    @staticmethod
+    def _known_mask(ids: Dict, values) -> int:
+        mask = 0
+        for value in values:
+            if value in ids:
+                mask |= 1 << ids[value]
+        return mask
+
+def _trigrams(texts) -> set:
+    """All three-character substrings of the given strings."""
+    return {text[i:i + 3] for text in texts for i in range(len(text) - 2)}
+
 class EntertainmentDatabase:
     """Class to manage the entertainment items database."""
     def __init__(self):
-        self.movies = {}
-        self.music = {}
-        self.books = {}
-        self.games = {}
+        self._catalog_version = 0
+        self._reset()
         
         # Initialize with sample data
         self._load_sample_data()
     
+    def _reset(self):
+        """Start from an empty catalog."""
+        # Items per media type, each keyed by item id
+        self._items = {media_type: {} for media_type in _COLLECTION_KEYS}
+        
+        # Raw item data per media type that load_from_file has not decoded yet
+        self._pending = {}
+        
+        # Bumped whenever items are added or replaced, and never reset, so
+        # caches keyed on it never see an old value again
+        self._catalog_version += 1
+        
+        # Scoring columns are rebuilt lazily after the catalog changes
+        self._value_ids = {"genre": {}, "creator": {}, "actors": {}, "platforms": {}}
+        self._masks = {}
+        self._columns = {}
+        self._rating_order = {}
+        
+        # Search index: insertion order of each item, and trigram -> item ids
+        self._search_order = {media_type: {} for media_type in _COLLECTION_KEYS}
+        self._search_index = {media_type: {} for media_type in _COLLECTION_KEYS}
+    
     def _load_sample_data(self):
         """Load sample entertainment data."""
         # Sample Movies
@@ -205,116 +446,193 @@ class EntertainmentDatabase:
         self.add_game(Game("g5", "Minecraft", ["Sandbox", "Survival"], 2011, 9.3, 
                           "Mojang", ["PC", "Console", "Mobile"], True))
     
+    def _mask(self, axis: str, values: List[str]) -> Optional[int]:
+        """Pack values into a bitset, assigning ids to values seen for the first time.
+        
+        Returns None when a value repeats, since a bitset would count it only once.
+        """
+        ids = self._value_ids[axis]
+        mask = 0
+        for value in values:
+            mask |= 1 << ids.setdefault(value, len(ids))
+        return mask if mask.bit_count() == len(values) else None
+    
+    def add_item(self, item: EntertainmentItem):
+        """Add or replace an item in the collection of its media type."""
+        media_type = item.media_type
+        _, _, list_attr, _ = _COLUMN_FIELDS[media_type]
+        genre_mask = self._mask("genre", item.genre)
+        extras_mask = self._mask(list_attr, getattr(item, list_attr)) if list_attr else 0
+        
+        items = self._collection(media_type)
+        replaced = items.get(item.item_id)
+        self._index_for_search(media_type, item, replaced)
+        self._masks.pop(replaced, None)
+        if genre_mask is not None and extras_mask is not None:
+            self._masks[item] = (genre_mask, extras_mask)
+        items[item.item_id] = item
+        self._columns.pop(media_type, None)
+        self._rating_order.pop(media_type, None)
+        self._catalog_version += 1
+    
     def add_movie(self, movie: Movie):
-        self.movies[movie.item_id] = movie
+        self.add_item(movie)
     
     def add_music(self, music: Music):
-        self.music[music.item_id] = music
+        self.add_item(music)
     
     def add_book(self, book: Book):
-        self.books[book.item_id] = book
+        self.add_item(book)
     
     def add_game(self, game: Game):
-        self.games[game.item_id] = game
+        self.add_item(game)
+    
+    def _index_for_search(self, media_type: str, item: EntertainmentItem, replaced: Optional[EntertainmentItem]):
+        """Index the trigrams of an item's lowercased title and genres."""
+        index = self._search_index[media_type]
+        order = self._search_order[media_type]
+        
+        # Drop the postings of the item being replaced
+        if replaced is not None:
+            for gram in _trigrams((replaced._title_lower,) + replaced._genre_lower):
+                index[gram].discard(replaced.item_id)
+        
+        order.setdefault(item.item_id, len(order))
+        for gram in _trigrams((item._title_lower,) + item._genre_lower):
+            index.setdefault(gram, set()).add(item.item_id)
+    
+    def search(self, media_type: str, query: str) -> List[EntertainmentItem]:
+        """Find items whose title or one of whose genres contains the lowercased query."""
+        items = self._collection(media_type)
+        
+        # Every trigram of the query must occur in a matching item; queries
+        # shorter than a trigram are checked against every item
+        postings = sorted((self._search_index[media_type].get(gram, set()) for gram in _trigrams((query,))), key=len)
+        if not postings:
+            return [item for item in items.values() if item.matches_query(query)]
+        
+        # The trigrams may come from different strings, so confirm the substring
+        candidates = postings[0].intersection(*postings[1:])
+        matches = [item_id for item_id in candidates if items[item_id].matches_query(query)]
+        matches.sort(key=self._search_order[media_type].__getitem__)
+        return [items[item_id] for item_id in matches]
+    
+    def _collection(self, media_type: str) -> Dict[str, EntertainmentItem]:
+        """The items of a media type, decoding them first if load_from_file deferred it."""
+        pending = self._pending.get(media_type)
+        if pending:
+            # Decode the whole media type before dropping the raw data, so a
+            # failure leaves it pending rather than half loaded
+            item_class = _ITEM_CLASSES[media_type]
+            decoded = [item_class.from_dict(item_data) for item_data in pending.values()]
+            del self._pending[media_type]
+            for item in decoded:
+                self.add_item(item)
+        return self._items[media_type]
+    
+    # The collections are read-only views, so every change goes through
+    # add_item and keeps the search index, bitsets and caches in step
+    @property
+    def movies(self) -> Mapping[str, Movie]:
+        return types.MappingProxyType(self._collection("movie"))
+    
+    @property
+    def music(self) -> Mapping[str, Music]:
+        return types.MappingProxyType(self._collection("music"))
+    
+    @property
+    def books(self) -> Mapping[str, Book]:
+        return types.MappingProxyType(self._collection("book"))
+    
+    @property
+    def games(self) -> Mapping[str, Game]:
+        return types.MappingProxyType(self._collection("game"))
+    
+    def get_items(self, media_type: str) -> List[EntertainmentItem]:
+        return list(self._collection(media_type).values())
+    
+    def get_item_by_id(self, media_type: str, item_id: str) -> Optional[EntertainmentItem]:
+        return self._collection(media_type).get(item_id)
     
     def get_movies(self) -> List[Movie]:
-        return list(self.movies.values())
+        return self.get_items("movie")
     
     def get_music(self) -> List[Music]:
-        return list(self.music.values())
+        return self.get_items("music")
     
     def get_books(self) -> List[Book]:
-        return list(self.books.values())
+        return self.get_items("book")
     
     def get_games(self) -> List[Game]:
-        return list(self.games.values())
+        return self.get_items("game")
+    
+    def get_columns(self, media_type: str) -> CatalogColumns:
+        """Get the structure-of-arrays columns for a media type, rebuilding them if stale."""
+        if media_type not in self._columns:
+            items = self._collection(media_type)
+            self._columns[media_type] = CatalogColumns(list(items.values()), self._value_ids, media_type)
+        return self._columns[media_type]
+    
+    def get_masks(self, item: EntertainmentItem) -> Optional[tuple]:
+        """Get the genre and list bitsets of a stored item over this database's value ids.
+        
+        Returns None for items that are not in the catalog and for items whose
+        lists repeat a value; those are scored by counting instead.
+        """
+        return self._masks.get(item)
+    
+    def get_rating_order(self, media_type: str):
+        """Get (position, item) pairs of a media type, highest rated first, with the largest genre and list sizes.
+        
+        The last field bounds how often one value repeats within an item's genre or list.
+        """
+        if media_type not in self._rating_order:
+            items = self.get_items(media_type)
+            _, _, list_attr, _ = _COLUMN_FIELDS[media_type]
+            ranked = sorted(enumerate(items), key=lambda entry: -entry[1].rating)
+            lists = [item.genre for item in items]
+            if list_attr:
+                lists += [getattr(item, list_attr) for item in items]
+            max_genres = max((len(item.genre) for item in items), default=0)
+            max_extras = max((len(getattr(item, list_attr)) for item in items), default=0) if list_attr else 0
+            max_repeats = max((len(values) - len(set(values)) + 1 for values in lists), default=1)
+            self._rating_order[media_type] = (ranked, max_genres, max_extras, max_repeats)
+        return self._rating_order[media_type]
     
     def get_movie_by_id(self, movie_id: str) -> Optional[Movie]:
-        return self.movies.get(movie_id)
+        return self.get_item_by_id("movie", movie_id)
     
     def get_music_by_id(self, music_id: str) -> Optional[Music]:
-        return self.music.get(music_id)
+        return self.get_item_by_id("music", music_id)
     
     def get_book_by_id(self, book_id: str) -> Optional[Book]:
-        return self.books.get(book_id)
+        return self.get_item_by_id("book", book_id)
     
     def get_game_by_id(self, game_id: str) -> Optional[Game]:
-        return self.games.get(game_id)
+        return self.get_item_by_id("game", game_id)
     
     def save_to_file(self, filename: str = "entertainment_db.json"):
         """Save the database to a JSON file."""
-        data = {
-            "movies": {k: v.to_dict() for k, v in self.movies.items()},
-            "music": {k: v.to_dict() for k, v in self.music.items()},
-            "books": {k: v.to_dict() for k, v in self.books.items()},
-            "games": {k: v.to_dict() for k, v in self.games.items()}
-        }
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=4)
+        data = {key: {k: v.to_dict() for k, v in self._collection(media_type).items()}
+                for media_type, key in _COLLECTION_KEYS.items()}
+        _write_json(filename, data)
     
     def load_from_file(self, filename: str = "entertainment_db.json"):
-        """Load the database from a JSON file."""
+        """Load the database from a JSON file.
+        
+        Only the JSON is parsed and each item checked with check_dict here;
+        items are built the first time their media type is accessed. A file
+        that fails the check leaves the current catalog in place.
+        """
         try:
-            with open(filename, 'r') as f:
-                data = json.load(f)
-            
-            # Clear current data
-            self.movies = {}
-            self.music = {}
-            self.books = {}
-            self.games = {}
+            data = _read_json(filename)
+            for media_type, key in _COLLECTION_KEYS.items():
+                for item_data in data.get(key, {}).values():
+                    _ITEM_CLASSES[media_type].check_dict(item_data)
             
-            # Load movies
-            for movie_id, movie_data in data.get("movies", {}).items():
-                self.add_movie(Movie(
-                    movie_data["id"],
-                    movie_data["title"],
-                    movie_data["genre"],
-                    movie_data["year"],
-                    movie_data["rating"],
-                    movie_data["director"],
-                    movie_data["actors"],
-                    movie_data["duration"]
-                ))
-            
-            # Load music
-            for music_id, music_data in data.get("music", {}).items():
-                self.add_music(Music(
-                    music_data["id"],
-                    music_data["title"],
-                    music_data["genre"],
-                    music_data["year"],
-                    music_data["rating"],
-                    music_data["artist"],
-                    music_data.get("album"),
-                    music_data.get("duration")
-                ))
-            
-            # Load books
-            for book_id, book_data in data.get("books", {}).items():
-                self.add_book(Book(
-                    book_data["id"],
-                    book_data["title"],
-                    book_data["genre"],
-                    book_data["year"],
-                    book_data["rating"],
-                    book_data["author"],
-                    book_data["pages"],
-                    book_data["publisher"]
-                ))
-            
-            # Load games
-            for game_id, game_data in data.get("games", {}).items():
-                self.add_game(Game(
-                    game_data["id"],
-                    game_data["title"],
-                    game_data["genre"],
-                    game_data["year"],
-                    game_data["rating"],
-                    game_data["developer"],
-                    game_data["platforms"],
-                    game_data["multiplayer"]
-                ))
+            # Clear current data; items are decoded per media type the first time they are used
+            self._reset()
+            self._pending = {media_type: data.get(key, {}) for media_type, key in _COLLECTION_KEYS.items()}
             
             return True
         except Exception as e:
@@ -322,112 +640,323 @@ class EntertainmentDatabase:
             return False
 
 
+def _top_k_indices(scores: "np.ndarray", count: int) -> "np.ndarray":
+    """Indices of the 'count' highest scores, ordered like a stable descending sort."""
+    if count <= 0:
+        return np.array([], dtype=np.int64)
+    if count >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    
+    # Partition to find the k-th best score, then break ties by position
+    kth = np.partition(scores, len(scores) - count)[len(scores) - count]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:count - len(above)]
+    top = np.concatenate((above, ties))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+_KERNEL_SIGNATURE = ("void(f8[::1], i8[::1], i8[::1], i8[::1], b1[::1], i8[::1], b1[::1], f8, "
+                     "i8[::1], i8[::1], b1[::1], f8, b1, i8[::1], i8[::1], b1[::1], f8[::1])")
+
+def _kernel_loop(ratings, years, genre_offsets, genre_ids, wanted_genres, creators, wanted_creators,
+                 creator_weight, extra_offsets, extra_ids, wanted_extras, extra_weight, extra_per_match,
+                 exact_years, near_years, consumed, out):
+    """calculate_match_score over structure-of-arrays columns, written into 'out'; compiled by Numba."""
+    for i in range(ratings.shape[0]):
+        score = ratings[i] / 10.0
+        
+        matches = 0
+        for j in range(genre_offsets[i], genre_offsets[i + 1]):
+            if wanted_genres[genre_ids[j]]:
+                matches += 1
+        score += 0.3 * matches
+        
+        year_bonus = 0.0
+        for year in near_years:
+            if year == years[i]:
+                year_bonus = 0.1
+                break
+        for year in exact_years:
+            if year == years[i]:
+                year_bonus = 0.2
+                break
+        if year_bonus > 0.0:
+            score += year_bonus
+        
+        if wanted_creators[creators[i]]:
+            score += creator_weight
+        
+        matches = 0
+        for j in range(extra_offsets[i], extra_offsets[i + 1]):
+            if wanted_extras[extra_ids[j]]:
+                matches += 1
+        if extra_per_match:
+            score += extra_weight * matches
+        elif matches > 0:
+            score += extra_weight
+        
+        if consumed[i]:
+            score -= 1.0
+        out[i] = score
+
+
+def _numba_kernel():
+    """Compile _kernel_loop with Numba, or load it from the cache."""
+    return njit(_KERNEL_SIGNATURE, cache=True)(_kernel_loop)
+
+
+if _entertainment_scoring is not None:
+    _score_kernel = _entertainment_scoring.score_all
+elif njit is not None:
+    # The signature is given up front, so this compiles the kernel at import
+    _score_kernel = _numba_kernel()
+else:
+    _score_kernel = None
+
+# Per media type: (creator weight, list weight, whether the list weight
+# is added per match rather than once)
+_TYPE_WEIGHTS = {
+    "movie": (0.2, 0.15, True),
+    "music": (0.4, 0.0, False),
+    "book": (0.4, 0.0, False),
+    "game": (0.2, 0.2, False)
+}
+
+
 class RecommendationEngine:
     """Class to generate personalized recommendations."""
     def __init__(self, database: EntertainmentDatabase):
         self.db = database
+        
+        # Recommendations per live user, keyed by id(user): the (user version,
+        # catalog version) they were computed for and the results by (media type, count).
+        # An entry is dropped when its user is garbage collected.
+        self._recommendation_cache = {}
+        self._cached_trending = functools.lru_cache(maxsize=64)(self._trending)
+        
+        # Today's date and the timestamp of the next local midnight
+        self._today_date = None
+        self._day_ends_at = 0.0
     
     def calculate_match_score(self, item: EntertainmentItem, user: UserProfile, media_type: str) -> float:
         """Calculate how well an item matches user preferences."""
+        return self._score_item(item, PreferenceSnapshot(user, media_type, self.db._value_ids))
+    
+    def _score_item(self, item: EntertainmentItem, prefs: PreferenceSnapshot) -> float:
+        """Score one item against preferences that were hashed up front."""
         score = 0.0
         
         # Base score on rating
         score += item.rating / 10.0  # Convert to 0-1 scale
         
+        # Genre and list matches come from the stored bitsets when the database has them
+        masks = self.db.get_masks(item)
+        
         # Check genres
-        user_genres = user.preferences[media_type]["genres"]
-        for genre in item.genre:
-            if genre in user_genres:
-                score += 0.3
+        if masks is not None:
+            score += 0.3 * (masks[0] & prefs.genre_mask).bit_count()
+        else:
+            score += 0.3 * sum(genre in prefs.genres for genre in item.genre)
         
         # Check years
-        user_years = user.preferences[media_type]["years"]
-        if item.year in user_years:
+        if item.year in prefs.years:
             score += 0.2
-        elif any(abs(item.year - year) <= 5 for year in user_years):
+        elif item.year in prefs.near_years:
             score += 0.1
         
         # Check item-specific characteristics
-        if media_type == "movie":
-            # Check directors
-            if item.director in user.preferences["movie"]["directors"]:
-                score += 0.2
-            
-            # Check actors
-            for actor in item.actors:
-                if actor in user.preferences["movie"]["actors"]:
-                    score += 0.15
-        
-        elif media_type == "music":
-            # Check artists
-            if item.artist in user.preferences["music"]["artists"]:
-                score += 0.4
-        
-        elif media_type == "book":
-            # Check authors
-            if item.author in user.preferences["book"]["authors"]:
-                score += 0.4
-        
-        elif media_type == "game":
-            # Check developers
-            if item.developer in user.preferences["game"]["developers"]:
-                score += 0.2
-            
-            # Check platforms
-            for platform in item.platforms:
-                if platform in user.preferences["game"]["platforms"]:
-                    score += 0.2
-                    break
+        creator_weight, extra_weight, extra_per_match = _TYPE_WEIGHTS[prefs.media_type]
+        
+        # Check directors, artists, authors or developers
+        if getattr(item, prefs.creator_attr) in prefs.creators:
+            score += creator_weight
+        
+        # Check actors or platforms
+        if prefs.list_attr:
+            if masks is not None:
+                matches = (masks[1] & prefs.extras_mask).bit_count()
+            else:
+                matches = sum(value in prefs.extras for value in getattr(item, prefs.list_attr))
+            if extra_per_match:
+                score += extra_weight * matches
+            elif matches:
+                score += extra_weight
         
         # Penalize already consumed items
-        if item.item_id in user.history[media_type]:
+        if item.item_id in prefs.history:
             score -= 1.0
         
         return score
     
+    def _score_items(self, prefs: PreferenceSnapshot) -> "np.ndarray":
+        """Vectorized calculate_match_score over every item of a media type."""
+        if _score_kernel is not None:
+            return self._score_items_compiled(prefs, _score_kernel)
+        return self._score_items_numpy(prefs)
+    
+    def _score_items_numpy(self, prefs: PreferenceSnapshot) -> "np.ndarray":
+        """_score_items with NumPy array operations."""
+        media_type = prefs.media_type
+        cols = self.db.get_columns(media_type)
+        value_ids = self.db._value_ids
+        
+        # Base score on rating
+        scores = cols.ratings / 10.0
+        
+        # Check genres
+        scores += 0.3 * cols.count_matches(cols.genres, value_ids["genre"], prefs.genres)
+        
+        # Check years
+        if prefs.years:
+            exact = np.isin(cols.years, np.fromiter(prefs.whole_years, dtype=np.int64))
+            near = np.isin(cols.years, np.fromiter(prefs.near_years, dtype=np.int64))
+            scores += np.where(exact, 0.2, np.where(near, 0.1, 0.0))
+        
+        # Check item-specific characteristics
+        creator_weight, extra_weight, extra_per_match = _TYPE_WEIGHTS[media_type]
+        scores += creator_weight * cols.is_member(value_ids["creator"], prefs.creators)
+        if prefs.list_attr:
+            matches = cols.count_matches(cols.extras, value_ids[prefs.list_attr], prefs.extras)
+            scores += extra_weight * (matches if extra_per_match else matches > 0)
+        
+        # Penalize already consumed items
+        consumed = [cols.rows[item_id] for item_id in prefs.history if item_id in cols.rows]
+        scores[consumed] -= 1.0
+        
+        return scores
+    
+    def _score_items_compiled(self, prefs: PreferenceSnapshot, kernel) -> "np.ndarray":
+        """_score_items through the Cython or Numba kernel."""
+        media_type = prefs.media_type
+        cols = self.db.get_columns(media_type)
+        value_ids = self.db._value_ids
+        _, _, list_attr, _ = _COLUMN_FIELDS[media_type]
+        creator_weight, extra_weight, extra_per_match = _TYPE_WEIGHTS[media_type]
+        
+        consumed = np.zeros(len(cols.items), dtype=bool)
+        consumed[[cols.rows[item_id] for item_id in prefs.history if item_id in cols.rows]] = True
+        
+        _, genre_ids, genre_offsets = cols.genres
+        _, extra_ids, extra_offsets = cols.extras
+        scores = np.empty(len(cols.items), dtype=np.float64)
+        kernel(cols.ratings, cols.years, genre_offsets, genre_ids,
+               _wanted_mask(value_ids["genre"], prefs.genres),
+               cols.creators, _wanted_mask(value_ids["creator"], prefs.creators), creator_weight,
+               extra_offsets, extra_ids, _wanted_mask(value_ids[list_attr] if list_attr else {}, prefs.extras),
+               extra_weight, extra_per_match,
+               np.fromiter(prefs.whole_years, dtype=np.int64), np.fromiter(prefs.near_years, dtype=np.int64),
+               consumed, scores)
+        return scores
+    
     def get_recommendations(self, user: UserProfile, media_type: str, count: int = 3) -> List[Dict]:
         """Get personalized recommendations for a specific media type."""
-        all_items = []
+        return list(self._cached_recommendations(user, media_type, count))
+    
+    def get_recommendations_all(self, user: UserProfile, count: int = 3) -> Dict[str, List[Dict]]:
+        """Get personalized recommendations for every media type, keyed by collection name."""
+        return {key: list(self._cached_recommendations(user, media_type, count))
+                for media_type, key in _COLLECTION_KEYS.items()}
+    
+    def _cached_recommendations(self, user: UserProfile, media_type: str, count: int) -> List[Dict]:
+        """_recommend, cached until the user or the catalog changes."""
+        key = id(user)
+        versions = (user._version, self.db._catalog_version)
+        entry = self._recommendation_cache.get(key)
+        if entry is None:
+            weakref.finalize(user, self._recommendation_cache.pop, key, None)
+        if entry is None or entry[0] != versions:
+            entry = self._recommendation_cache[key] = (versions, {})
+        
+        results = entry[1]
+        if (media_type, count) not in results:
+            results[(media_type, count)] = self._recommend(user, media_type, count)
+        return results[(media_type, count)]
+    
+    def _recommend(self, user: UserProfile, media_type: str, count: int) -> List[Dict]:
+        """Uncached get_recommendations."""
+        if media_type not in _COLUMN_FIELDS:
+            return []
         
-        if media_type == "movie":
-            all_items = self.db.get_movies()
-        elif media_type == "music":
-            all_items = self.db.get_music()
-        elif media_type == "book":
-            all_items = self.db.get_books()
-        elif media_type == "game":
-            all_items = self.db.get_games()
+        # The snapshot is built after the items are fetched, since decoding
+        # deferred items may intern new value ids
+        if np is not None:
+            cols = self.db.get_columns(media_type)
+            scores = self._score_items(PreferenceSnapshot(user, media_type, self.db._value_ids))
+            return [cols.items[row].to_dict() for row in _top_k_indices(scores, count)]
         
-        # Calculate match scores
-        scored_items = [(item, self.calculate_match_score(item, user, media_type)) for item in all_items]
+        if count <= 0:
+            return []
         
-        # Sort by score and take top 'count' items
-        scored_items.sort(key=lambda x: x[1], reverse=True)
-        top_items = [item.to_dict() for item, score in scored_items[:count]]
+        # Branch and bound: walk items from the highest rating down and stop once
+        # even the largest possible bonus cannot lift an item into the top 'count'
+        ranked, max_genres, max_extras, max_repeats = self.db.get_rating_order(media_type)
+        prefs = PreferenceSnapshot(user, media_type, self.db._value_ids)
+        max_bonus = self._max_bonus(prefs, max_genres, max_extras, max_repeats)
+        top = []  # min-heap of (score, -position, item); ties go to the earlier item
+        for position, item in ranked:
+            if len(top) == count and item.rating / 10.0 + max_bonus < top[0][0]:
+                break
+            entry = (self._score_item(item, prefs), -position, item)
+            if len(top) < count:
+                heapq.heappush(top, entry)
+            elif entry[:2] > top[0][:2]:
+                heapq.heapreplace(top, entry)
         
-        return top_items
+        top.sort(reverse=True)
+        return [item.to_dict() for _, _, item in top]
+    
+    @staticmethod
+    def _max_bonus(prefs: PreferenceSnapshot, max_genres: int, max_extras: int, max_repeats: int) -> float:
+        """Upper bound on what _score_item can add on top of the rating term."""
+        creator_weight, extra_weight, extra_per_match = _TYPE_WEIGHTS[prefs.media_type]
+        bonus = 0.3 * min(max_genres, len(prefs.genres) * max_repeats)
+        if prefs.years:
+            bonus += 0.2
+        if prefs.creators:
+            bonus += creator_weight
+        if prefs.extras:
+            bonus += extra_weight * (min(max_extras, len(prefs.extras) * max_repeats) if extra_per_match else 1)
+        return bonus + 1e-9  # slack for rounding differences against the real score
     
     def get_trending(self, media_type: str, count: int = 3) -> List[Dict]:
         """Get current trending items for a specific media type."""
+        # Trending does not depend on the user, so it is cached for the day
+        # or until the catalog changes
+        return list(self._cached_trending(media_type, count, self._today(), self.db._catalog_version))
+    
+    def get_trending_all(self, count: int = 3) -> Dict[str, List[Dict]]:
+        """Get current trending items for every media type, keyed by collection name."""
+        today, catalog_version = self._today(), self.db._catalog_version
+        return {key: list(self._cached_trending(media_type, count, today, catalog_version))
+                for media_type, key in _COLLECTION_KEYS.items()}
+    
+    def _today(self) -> date:
+        """Today's date, recomputed only after the cached day has ended."""
+        if time.time() >= self._day_ends_at:
+            self._today_date = date.today()
+            midnight = datetime.combine(self._today_date + timedelta(days=1), datetime.min.time())
+            self._day_ends_at = midnight.timestamp()
+        return self._today_date
+    
+    def _trending(self, media_type: str, count: int, today: date, catalog_version: int) -> List[Dict]:
+        """Uncached get_trending; the catalog version only keys the cache."""
         # In a real app, this would use actual trending data
         # For now, we'll simulate trending by taking the newest and highest rated items
+        if media_type not in _COLLECTION_KEYS:
+            return []
+        
+        # Rank by a combination of year (newer) and rating (higher)
+        current_year = today.year
+        if np is not None:
+            cols = self.db.get_columns(media_type)
+            scores = (current_year - cols.years) * 0.1 + cols.ratings
+            return [cols.items[row].to_dict() for row in _top_k_indices(scores, count)]
         
-        all_items = []
-        if media_type == "movie":
-            all_items = self.db.get_movies()
-        elif media_type == "music":
-            all_items = self.db.get_music()
-        elif media_type == "book":
-            all_items = self.db.get_books()
-        elif media_type == "game":
-            all_items = self.db.get_games()
-        
-        # Sort by a combination of year (newer) and rating (higher)
-        current_year = datetime.now().year
+        all_items = self.db.get_items(media_type)
         scored_items = [(item, (current_year - item.year) * 0.1 + item.rating) for item in all_items]
-        scored_items.sort(key=lambda x: x[1], reverse=True)
+        top = heapq.nlargest(count, scored_items, key=lambda x: x[1])
         
-        trending_items = [item.to_dict() for item, score in scored_items[:count]]
+        trending_items = [item.to_dict() for item, score in top]
         return trending_items
 
 
@@ -437,19 +966,47 @@ class EntertainmentAIAgent:
         self.db = EntertainmentDatabase()
         self.recommendation_engine = RecommendationEngine(self.db)
         self.users = {}
-        self.current_user = None
+        self._current_user_id = None
+        self._current_user_obj = None  # profile of current_user, saves a dict lookup per call
+    
+    @property
+    def current_user(self) -> Optional[str]:
+        """ID of the current user.
+        
+        After replacing the current user's profile in users, assign current_user
+        again so edits and recommendations use the new profile.
+        """
+        return self._current_user_id
+    
+    @current_user.setter
+    def current_user(self, user_id: Optional[str]):
+        if user_id is None:
+            self._current_user_id = None
+            self._current_user_obj = None
+        elif user_id in self.users:
+            self._select_user(user_id)
+        else:
+            raise KeyError(user_id)
+    
+    def _select_user(self, user_id: str):
+        """Make user_id the current user, keeping its profile at hand."""
+        self._current_user_id = user_id
+        self._current_user_obj = self.users[user_id]
     
     def load_data(self, db_filename: str = "entertainment_db.json", users_filename: str = "users.json"):
         """Load database and user data from files."""
         self.db.load_from_file(db_filename)
         
         try:
-            with open(users_filename, 'r') as f:
-                users_data = json.load(f)
+            users_data = _read_json(users_filename)
             
             for user_id, user_data in users_data.items():
                 self.users[user_id] = UserProfile.from_dict(user_data)
             
+            # The current user's profile may have been replaced by the loaded one
+            if self._current_user_id in self.users:
+                self._select_user(self._current_user_id)
+            
             return True
         except Exception as e:
             print(f"Error loading users: {e}")
@@ -460,58 +1017,53 @@ class EntertainmentAIAgent:
         self.db.save_to_file(db_filename)
         
         users_data = {user_id: user.to_dict() for user_id, user in self.users.items()}
-        with open(users_filename, 'w') as f:
-            json.dump(users_data, f, indent=4)
+        _write_json(users_filename, users_data)
     
     def create_user(self, name: str) -> str:
         """Create a new user profile."""
         user_id = f"user_{len(self.users) + 1}"
         self.users[user_id] = UserProfile(user_id, name)
-        self.current_user = user_id
+        self._select_user(user_id)
         return user_id
     
     def set_current_user(self, user_id: str) -> bool:
         """Set the current active user."""
         if user_id in self.users:
-            self.current_user = user_id
+            self._select_user(user_id)
             return True
         return False
     
     def add_user_preference(self, media_type: str, category: str, value: Union[str, int, float]) -> bool:
         """Add a preference to the current user's profile."""
-        if not self.current_user:
+        if self._current_user_obj is None:
             return False
         
-        self.users[self.current_user].add_preference(media_type, category, value)
+        self._current_user_obj.add_preference(media_type, category, value)
         return True
     
     def add_to_history(self, media_type: str, item_id: str) -> bool:
         """Add an item to the current user's history."""
-        if not self.current_user:
+        if self._current_user_obj is None:
             return False
         
-        self.users[self.current_user].add_to_history(media_type, item_id)
+        self._current_user_obj.add_to_history(media_type, item_id)
         return True
     
     def get_recommendations(self, media_type: str = None, count: int = 3) -> Dict:
         """Get personalized recommendations for the current user."""
-        if not self.current_user:
+        user = self._current_user_obj
+        if user is None:
             return {"error": "No user selected"}
         
-        user = self.users[self.current_user]
-        
         recommendations = {}
         
         if media_type:
             # Get recommendations for specific media type
-            if media_type in ["movie", "music", "book", "game"]:
+            if media_type in _COLLECTION_KEYS:
                 recommendations[media_type] = self.recommendation_engine.get_recommendations(user, media_type, count)
         else:
             # Get recommendations for all media types
-            recommendations["movies"] = self.recommendation_engine.get_recommendations(user, "movie", count)
-            recommendations["music"] = self.recommendation_engine.get_recommendations(user, "music", count)
-            recommendations["books"] = self.recommendation_engine.get_recommendations(user, "book", count)
-            recommendations["games"] = self.recommendation_engine.get_recommendations(user, "game", count)
+            recommendations = self.recommendation_engine.get_recommendations_all(user, count)
         
         return recommendations
     
@@ -521,14 +1073,11 @@ class EntertainmentAIAgent:
         
         if media_type:
             # Get trending items for specific media type
-            if media_type in ["movie", "music", "book", "game"]:
+            if media_type in _COLLECTION_KEYS:
                 trending[media_type] = self.recommendation_engine.get_trending(media_type, count)
         else:
             # Get trending items for all media types
-            trending["movies"] = self.recommendation_engine.get_trending("movie", count)
-            trending["music"] = self.recommendation_engine.get_trending("music", count)
-            trending["books"] = self.recommendation_engine.get_trending("book", count)
-            trending["games"] = self.recommendation_engine.get_trending("game", count)
+            trending = self.recommendation_engine.get_trending_all(count)
         
         return trending
     
@@ -537,40 +1086,78 @@ class EntertainmentAIAgent:
         results = {}
         query = query.lower()
         
-        def matches_query(item):
-            """Check if an item matches the search query."""
-            if query in item.title.lower():
-                return True
-            
-            for genre in item.genre:
-                if query in genre.lower():
-                    return True
-            
-            return False
-        
-        if media_type == "movie" or media_type is None:
-            movie_results = [movie.to_dict() for movie in self.db.get_movies() if matches_query(movie)]
-            if movie_results:
-                results["movies"] = movie_results
-        
-        if media_type == "music" or media_type is None:
-            music_results = [music.to_dict() for music in self.db.get_music() if matches_query(music)]
-            if music_results:
-                results["music"] = music_results
-        
-        if media_type == "book" or media_type is None:
-            book_results = [book.to_dict() for book in self.db.get_books() if matches_query(book)]
-            if book_results:
-                results["books"] = book_results
-        
-        if media_type == "game" or media_type is None:
-            game_results = [game.to_dict() for game in self.db.get_games() if matches_query(game)]
-            if game_results:
-                results["games"] = game_results
+        for search_type, key in _COLLECTION_KEYS.items():
+            if media_type == search_type or media_type is None:
+                matches = [item.to_dict() for item in self.db.search(search_type, query)]
+                if matches:
+                    results[key] = matches
         
         return results
 
 
+def check_scorers(item_count: int = 300, user_count: int = 20, seed: int = 0) -> bool:
+    """Score a random catalog with every available scorer and report whether they agree exactly.
+    
+    The pure Python scorer is the reference; the NumPy, Numba and Cython
+    scorers are checked against it when they are installed.
+    """
+    if np is None:
+        print("NumPy is not installed; only the pure Python scorer is available")
+        return True
+    
+    scorers = {"numpy": None}
+    if njit is not None:
+        scorers["numba"] = _score_kernel if _entertainment_scoring is None else _numba_kernel()
+    if _entertainment_scoring is not None:
+        scorers["cython"] = _entertainment_scoring.score_all
+    
+    # Small value pools, so preferences overlap items and lists sometimes repeat a value
+    rng = random.Random(seed)
+    genres = [f"genre{i}" for i in range(8)]
+    people = [f"person{i}" for i in range(8)]
+    pick = lambda pool: [rng.choice(pool) for _ in range(rng.randint(0, 4))]
+    
+    db = EntertainmentDatabase()
+    for i in range(item_count):
+        common = (f"x{i}", f"Item {i}", pick(genres), rng.randint(1950, 2024), round(rng.uniform(5, 10), 1))
+        db.add_movie(Movie(*common, rng.choice(people), pick(people), 120))
+        db.add_music(Music(*common, rng.choice(people)))
+        db.add_book(Book(*common, rng.choice(people), 300, "Publisher"))
+        db.add_game(Game(*common, rng.choice(people), pick(people), True))
+    
+    engine = RecommendationEngine(db)
+    agreed = True
+    for u in range(user_count):
+        user = UserProfile(f"user_{u}", f"User {u}")
+        for media_type, categories in user.preferences.items():
+            for category in categories:
+                for _ in range(rng.randint(0, 3)):
+                    if category in ("years", "ratings"):
+                        value = rng.choice([rng.randint(1950, 2024), rng.uniform(1950, 2024)])
+                    else:
+                        value = rng.choice(genres if category == "genres" else people)
+                    user.add_preference(media_type, category, value)
+            for _ in range(rng.randint(0, 5)):
+                user.add_to_history(media_type, f"x{rng.randrange(item_count)}")
+        
+        for media_type in _COLLECTION_KEYS:
+            cols = db.get_columns(media_type)
+            prefs = PreferenceSnapshot(user, media_type, db._value_ids)
+            expected = [engine._score_item(item, prefs) for item in cols.items]
+            for name, kernel in scorers.items():
+                if kernel is None:
+                    scores = engine._score_items_numpy(prefs)
+                else:
+                    scores = engine._score_items_compiled(prefs, kernel)
+                if scores.tolist() != expected:
+                    print(f"{name} scorer disagrees with the pure Python scorer for {user.user_id}, {media_type}")
+                    agreed = False
+    
+    if agreed:
+        print(f"Scorers agree: python, {', '.join(scorers)}")
+    return agreed
+
+
 # Example usage of the Entertainment AI Agent
 def main():
     # Initialize the agent
@@ -635,4 +1222,6 @@ def main():
 
 
 if __name__ == "__main__":
+    if "--check-scorers" in sys.argv[1:]:
+        sys.exit(0 if check_scorers() else 1)
     main()
\ No newline at end of file
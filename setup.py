@@ -0,0 +1,14 @@
+# Builds the optional Cython scoring kernel used by main.py:
+#     python setup.py build_ext --inplace
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+setup(
+    name="entertainment-ai-agent-scoring",
+    ext_modules=cythonize([
+        # -ffp-contract=off stops the compiler fusing multiply-adds, which would
+        # round differently from the Python, NumPy and Numba scorers
+        Extension("_entertainment_scoring", ["_entertainment_scoring.pyx"],
+                  extra_compile_args=["-O3", "-march=native", "-ffp-contract=off"])
+    ])
+)